@@ -10,8 +10,10 @@
 #
 # Test whether the LDAP database has changed and create new dumps if needed
 if test /var/lib/univention-ldap/ldap/data.mdb -nt /var/list/udm.users; then
-	/usr/sbin/udm users/user list | grep -v '^  jpegPhoto:' > /var/list/udm.users
-	/usr/sbin/udm groups/group list > /var/list/udm.groups
+	# Fetch both dumps concurrently
+	/usr/sbin/udm users/user list | grep -v '^  jpegPhoto:' > /var/list/udm.users &
+	/usr/sbin/udm groups/group list > /var/list/udm.groups &
+	wait
 	chown list:list /var/list/udm.*
 	chmod o-r /var/list/udm.*
 	sudo -u list /var/list/update_mls.sh
@@ -0,0 +1,21 @@
+#!/bin/bash
+#
+# Started as root by the UCS listener module ucs2mailman_listener.py
+# after LDAP changes. Processes the mailing lists affected by the
+# queued changes; ucs2mailman.py switches to the list identity after
+# reading the directory. Only the LDAP entries modified since the last
+# batch are fetched with ldapsearch into the local copy ucs2mailman.ldap,
+# so the work per batch does not depend on the size of the directory;
+# call with -F now and then (e.g. nightly) to notice deleted entries.
+#
+# Replace ADMIN@DOMAIN and MLDOMAIN as in update_mls.sh.
+# With the daemon from ucs2mailman.service running, call
+#  ucs2mailman.py -c ucs2mailman.sock -Q ucs2mailman.queue "$@"
+# instead, which leaves the work to the daemon.
+#
+# (c) Kurt Garloff <garloff@osb-alliance.com>, 9/2021
+# SPDX-License-Identifier: AGPL-3.0-or-later
+#
+
+cd /var/list
+ucs2mailman.py -a ADMIN@DOMAIN -t MLDOMAIN -l "$(ucr get ldap/base)" -L ucs2mailman.ldap -Q ucs2mailman.queue -S ucs2mailman.snap "$@" >> sync_queue.log 2>&1
@@ -0,0 +1,45 @@
+#
+# UCS listener module: Queue changed users and groups for ucs2mailman.py
+# Install to /usr/lib/univention-directory-listener/system/ and restart
+# univention-directory-listener.
+# The DNs are appended to /var/list/ucs2mailman.queue, once the listener
+# has been idle (postrun), /var/list/sync_queue.sh is started to process
+# the affected mailing lists.
+#
+# (c) Kurt Garloff <garloff@osb-alliance.com>, 9/2021
+# SPDX-License-Identifier: AGPL-3.0-or-later
+#
+
+from __future__ import absolute_import
+
+import subprocess
+
+import listener
+
+name = "ucs2mailman"
+description = "Queue changed users and groups for ucs2mailman.py"
+filter = "(|(univentionObjectType=users/user)(univentionObjectType=groups/group))"
+attributes = []
+
+queueFile = "/var/list/ucs2mailman.queue"
+syncCmd = "/var/list/sync_queue.sh"
+
+
+def handler(dn, new, old):
+    "Record DN of changed object in queue"
+    listener.setuid(0)
+    try:
+        with open(queueFile, "a") as f:
+            f.write(dn + "\n")
+    finally:
+        listener.unsetuid()
+
+
+def postrun():
+    "Start queue worker in the background (it debounces and serializes itself)"
+    listener.setuid(0)
+    try:
+        subprocess.Popen((syncCmd,), start_new_session = True, stdin = subprocess.DEVNULL,
+                         stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+    finally:
+        listener.unsetuid()
@@ -7,14 +7,21 @@
 # Replace ADMIN@DOMAIN with an existing admin user
 #  and MLDOMAIN with the domain for the mailing lists
 #  (or drop the -t parameter to go with the domain from LDAP).
+# Only lists whose LDAP data changed since the last run (recorded in
+#  ucs2mailman.snap) are processed; call with -F (e.g. nightly) to
+#  do a full resync that also repairs manual changes on the mailman side.
+# The parsed directory is cached in ucs2mailman.cache, so reruns over
+#  unchanged dumps (e.g. with -f for one list) skip parsing them.
+#  Like the dumps, it holds the names and mail addresses of all users
+#  and is only readable by the mailman identity (mode 0600).
 #
 # (c) Kurt Garloff <garloff@osb-alliance.com>, 9/2021
 # SPDX-License-Identifier: AGPL-3.0-or-later
 #
 
 cd /var/list
-if test udm.groups -nt stamp; then
-	ucs2mailman.py -a ADMIN@DOMAIN -t MLDOMAIN -u udm.users -g udm.groups && touch stamp
+if test udm.groups -nt stamp -o "$1" = "-F"; then
+	ucs2mailman.py -a ADMIN@DOMAIN -t MLDOMAIN -u udm.users -g udm.groups -C ucs2mailman.cache -S ucs2mailman.snap "$@" && touch stamp
 fi
 
 
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# Benchmark ucs2mailman.py against a synthetic UCS directory and an
+# in-memory fake of mailman3 (no LDAP nor mailman needed).
+#
+# (c) Kurt Garloff <garloff@osb-alliance.com>, AGPL-v3
+
+import os, sys, getopt, time, json, random, tempfile, contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import ucs2mailman as u2m
+
+domain = "bench.domain"
+mlDomain = "lists.bench.domain"
+
+
+def userDN(ix):
+    return "uid=user%i,cn=users,dc=bench,dc=domain" % ix
+
+def groupDN(ix):
+    return "cn=group%i,cn=groups,dc=bench,dc=domain" % ix
+
+def generate(dirName, nUsers, nGroups, perGroup, depth, nMails, rnd):
+    "Write udm style users.ldif and groups.ldif to dirName, return their names"
+    userFile = os.path.join(dirName, "users.ldif")
+    groupFile = os.path.join(dirName, "groups.ldif")
+    members = [rnd.sample(range(nUsers), min(perGroup, nUsers)) for gr in range(nGroups)]
+    userGroups = [[] for ix in range(nUsers)]
+    for gr in range(nGroups):
+        for ix in members[gr]:
+            userGroups[ix].append(gr)
+    with open(userFile, "w") as out:
+        for ix in range(nUsers):
+            out.write("DN: %s\n" % userDN(ix))
+            out.write("  displayName: First%i Last%i\n" % (ix, ix))
+            out.write("  PasswordRecoveryEmail: user%i@private.example\n" % ix)
+            for mx in range(nMails):
+                out.write("  e-mail: user%i.%i@%s\n" % (ix, mx, domain))
+            for gr in userGroups[ix]:
+                out.write("  groups: %s\n" % groupDN(gr))
+            out.write("\n")
+    # Chains of depth+1 groups, each one nested into the previous one
+    with open(groupFile, "w") as out:
+        for gr in range(nGroups):
+            out.write("DN: %s\n" % groupDN(gr))
+            out.write("  description: Bench group %i\n" % gr)
+            out.write("  mailAddress: group%i@%s\n" % (gr, domain))
+            out.write("  name: group%i\n" % gr)
+            if depth and gr % (depth + 1) != depth and gr + 1 < nGroups:
+                out.write("  nestedGroup: %s\n" % groupDN(gr + 1))
+            for ix in members[gr]:
+                out.write("  users: %s\n" % userDN(ix))
+            out.write("\n")
+    return (userFile, groupFile)
+
+
+class fakeMailman:
+    """In-memory stand-in for the mm backends of ucs2mailman.py.
+       Lists are posting addresses, users are ints."""
+    def __init__(self):
+        # posting address -> {(role, email)}
+        self.mls = {}
+        # email -> user
+        self.addrs = {}
+        # user -> [emails]
+        self.userAddrs = {}
+        self.prefs = {}
+        self.changes = 0
+    def lists(self, names = None):
+        return { name: name for name in self.mls if names is None or name in names }
+    def listId(self, ml):
+        return ml
+    def rosters(self, listIds, roles):
+        for listId in listIds:
+            for (role, email) in self.mls[listId]:
+                if role in roles:
+                    yield (listId, role, email)
+    def prefetchUsers(self, emails):
+        users = set(self.addrs[email] for email in emails if email in self.addrs)
+        return [(user, list(self.userAddrs[user])) for user in users]
+    def findUser(self, email):
+        return self.addrs.get(email)
+    def userAddresses(self, user):
+        return list(self.userAddrs[user])
+    def makeUser(self, email, dName):
+        # ucs2mailman.py tests users for truth, so start at 1
+        user = len(self.userAddrs) + 1
+        self.userAddrs[user] = []
+        self.register(user, email, dName)
+        self.prefs[user] = email
+        return user
+    def register(self, user, email, dName):
+        if email in self.addrs:
+            return False
+        self.addrs[email] = user
+        self.userAddrs[user].append(email)
+        self.changes += 1
+        return True
+    def preferred(self, user):
+        return self.prefs.get(user)
+    def setPreferred(self, user, email):
+        self.prefs[user] = email
+        self.changes += 1
+    def createList(self, fqdn, description):
+        self.mls[fqdn] = set()
+        self.changes += 1
+        return fqdn
+    def subscribe(self, ml, user, email, role):
+        self.mls[ml].add((role, email or self.prefs[user]))
+        self.changes += 1
+    def unsubscribe(self, ml, email, role):
+        self.mls[ml].remove((role, email))
+        self.changes += 1
+    def commit(self):
+        pass
+    def userName(self, user):
+        return "<User %i>" % user
+
+def seed(fake, lGroups, churn, rnd):
+    "Subscribe group members to fake, leaving out/adding a churn fraction of them"
+    allUsers = set()
+    for lg in lGroups:
+        allUsers |= lg.members
+    allUsers = sorted(allUsers, key = u2m.ldapUser.sortKey)
+    users = {}
+    def user(lUser):
+        if lUser not in users:
+            users[lUser] = fake.makeUser(lUser.primMail.lower(), lUser.dName)
+            for mail in lUser.mails:
+                fake.register(users[lUser], mail.lower(), lUser.dName)
+        return users[lUser]
+    for lg in lGroups:
+        fake.createList(lg.mailAddr, "")
+        members = sorted(lg.members, key = u2m.ldapUser.sortKey)
+        subscribers = [x for x in members if rnd.random() >= churn]
+        subscribers += rnd.sample(allUsers, int(churn * len(members)))
+        for lUser in subscribers:
+            mmUser = user(lUser)
+            for email in fake.userAddrs[mmUser]:
+                fake.subscribe(lg.mailAddr, mmUser, email, "member" if email == fake.prefs[mmUser] else "nonmember")
+    fake.changes = 0
+
+
+def timed(timings, phase, func, *args):
+    "Call func(args) with stdout discarded, store wall time in timings[phase]"
+    with open(os.devnull, "w") as devNull, contextlib.redirect_stdout(devNull):
+        start = time.perf_counter()
+        ret = func(*args)
+        timings[phase] = time.perf_counter() - start
+    return ret
+
+def diffAll(lGroups, mLists):
+    "Bulk load MM state and diff all lists"
+    u2m.mmIdx = u2m.prefetchMM(lGroups, mLists)
+    return sum(len(u2m.diffGroup(lg, mLists[lg.mailAddr])) for lg in lGroups if lg.mailAddr in mLists)
+
+def bench(params, dirName):
+    "Run one benchmark, return dict with params, timings and counts"
+    rnd = random.Random(params["seed"])
+    timings = {}
+    (u2m.userFile, u2m.groupFile) = timed(timings, "generate", generate, dirName, params["users"],
+            params["groups"], params["members"], params["depth"], params["mails"], rnd)
+    u2m.nested = params["depth"] + 1
+    u2m.admin = "admin@" + domain
+    (lUsers, lGroups) = timed(timings, "parse", u2m.collectDirectory, mlDomain)
+    timed(timings, "nested", u2m.recurseNestedGroups, lUsers, lGroups, u2m.nested)
+    fake = fakeMailman()
+    seed(fake, lGroups, params["churn"], rnd)
+    u2m.mm = fake
+    changes = timed(timings, "diff", diffAll, lGroups, u2m.collectMMLists())
+    # reconcile prefetches and diffs again, only its apply phase counts as apply
+    u2m.stats = u2m.runStats()
+    timed(timings, "reconcile", u2m.reconcile, lGroups, u2m.collectMMLists())
+    timings["apply"] = u2m.stats.phases.get("apply", [0.0, 0.0])[0]
+    return { "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "params": params, "timings": timings,
+             "subscriptions": sum(len(x) for x in fake.mls.values()),
+             "diff": changes, "changes": fake.changes }
+
+
+def usage(ret):
+    print("Usage: bench.py [-U USERS] [-G GROUPS] [-M MEMBERS] [-D DEPTH] [-E MAILS] [-c CHURN]")
+    print("       [-r RUNS] [-s SEED] [-o FILE] [-k DIR]")
+    print("Generates a synthetic udm dump and times the parse, nested, diff and apply phases")
+    print("of ucs2mailman.py against an in-memory fake mailman3.")
+    print(" -U USERS   => number of users (default 2000)")
+    print(" -G GROUPS  => number of groups/lists (default 200)")
+    print(" -M MEMBERS => direct members per group (default 50)")
+    print(" -D DEPTH   => nesting depth of groups (default 2)")
+    print(" -E MAILS   => secondary mails per user (default 2, plus a recovery mail)")
+    print(" -c CHURN   => fraction of subscriptions that are missing/extra in mailman (default 0.05)")
+    print(" -r RUNS    => repeat RUNS times (default 1)")
+    print(" -s SEED    => random seed (default 42)")
+    print(" -o FILE    => append results as JSON lines to FILE")
+    print(" -k DIR     => write the generated LDIF to DIR and keep it")
+    sys.exit(ret)
+
+def main(argv):
+    params = { "users": 2000, "groups": 200, "members": 50, "depth": 2, "mails": 2,
+               "churn": 0.05, "seed": 42 }
+    runs = 1
+    outFile = None
+    keepDir = None
+    try:
+        (optlist, args) = getopt.gnu_getopt(argv[1:], 'hU:G:M:D:E:c:r:s:o:k:')
+    except getopt.GetoptError as exc:
+        print(exc)
+        usage(1)
+    opts = { "-U": "users", "-G": "groups", "-M": "members", "-D": "depth", "-E": "mails", "-s": "seed" }
+    for (opt, arg) in optlist:
+        if opt == "-h":
+            usage(0)
+        if opt in opts:
+            params[opts[opt]] = int(arg)
+        if opt == "-c":
+            params["churn"] = float(arg)
+        if opt == "-r":
+            runs = int(arg)
+        if opt == "-o":
+            outFile = arg
+        if opt == "-k":
+            keepDir = arg
+    print("Params: %s" % params)
+    print("%-4s %9s %9s %9s %9s %9s %8s" % ("run", "generate", "parse", "nested", "diff", "apply", "changes"))
+    for run in range(runs):
+        if keepDir:
+            os.makedirs(keepDir, exist_ok = True)
+            res = bench(params, keepDir)
+        else:
+            with tempfile.TemporaryDirectory() as dirName:
+                res = bench(params, dirName)
+        tm = res["timings"]
+        print("%-4i %8.3fs %8.3fs %8.3fs %8.3fs %8.3fs %8i" % (run, tm["generate"], tm["parse"],
+              tm["nested"], tm["diff"], tm["apply"], res["changes"]))
+        if outFile:
+            with open(outFile, "a") as out:
+                out.write(json.dumps(res) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
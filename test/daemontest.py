@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# Check that the sync daemon (-w) with the local copy of LDAP (-L) only
+# re-reads the directory when LDAP changed, feeding the ldapsearch
+# fixtures of test 03 instead of running ldapsearch (no LDAP needed).
+#
+# (c) Kurt Garloff <garloff@osb-alliance.com>, AGPL-v3
+
+import os, sys, tempfile, contextlib
+
+testDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(testDir, ".."))
+import ucs2mailman as u2m
+
+# Replacements applied to the fixtures, to simulate LDAP changes
+edits = []
+
+def fixtureSource(fname, udmModule, since = None):
+    "Stand-in for ldifSource, yields the lines of the 03 ldapsearch fixture for udmModule"
+    kind = "user" if udmModule == "users/user" else "group"
+    with open(os.path.join(testDir, "03_%s.ldapsearch" % kind), "r") as f:
+        for ln in f:
+            for (old, new) in edits:
+                ln = ln.replace(old, new)
+            yield ln
+
+def main(argv):
+    u2m.ldifSource = fixtureSource
+    u2m.ldapBase = "dc=test,dc=domain"
+    u2m.stats = u2m.runStats()
+    with tempfile.TemporaryDirectory() as tmpDir, open(os.devnull, "w") as devNull, \
+         contextlib.redirect_stdout(devNull):
+        u2m.deltaFile = os.path.join(tmpDir, "ldap")
+        daemon = u2m.syncDaemon(os.path.join(tmpDir, "sock"), None, None)
+        assert(daemon.refresh(False) is None)
+        first = daemon.directory
+        assert(first)
+        # Second trigger, LDAP unchanged: reuse the cached directory
+        assert(daemon.refresh(False) is first)
+        assert(daemon.directory is first)
+        # LDAP changed: re-read, return the previous directory
+        edits.append(("displayName: First1 Last1", "displayName: First1 Renamed"))
+        assert(daemon.refresh(False) is first)
+        assert(daemon.directory is not first)
+        second = daemon.directory
+        assert(daemon.refresh(False) is second and daemon.directory is second)
+        # Full sync always re-reads
+        assert(daemon.refresh(True) is second and daemon.directory is not second)
+    print("Directory reused while LDAP is unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
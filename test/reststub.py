@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# In-memory stand-in for the parts of the mailman3 REST API that
+# ucs2mailman.py -m uses, so the REST backend can be tested without
+# mailman3 (see test.sh). Knows the user admin@test.domain.
+#
+# Usage: reststub.py PORT                   => serve on 127.0.0.1:PORT
+#        reststub.py PORT roster LIST ROLE  => print the emails subscribed
+#                                              to LIST (list_id) with ROLE
+#
+# (c) Kurt Garloff <garloff@osb-alliance.com>, AGPL-v3
+
+import sys, re, json, itertools
+import urllib.parse, urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# list_id -> {"fqdn": posting address, "config": {...}}
+lists = {}
+# user_id -> {"name": display name, "pref": preferred email}
+users = {"admin": {"name": "Admin", "pref": "admin@test.domain"}}
+# email -> {"user": user_id or None, "verified": bool}
+addrs = {"admin@test.domain": {"user": "admin", "verified": True}}
+# member_id -> {"list_id", "email" (None: user's preferred), "role", "user"}
+members = {}
+ids = itertools.count(1)
+
+
+def memberJSON(memberId, member):
+    email = member["email"] or users[member["user"]]["pref"]
+    return {"member_id": memberId, "email": email, "list_id": member["list_id"], "role": member["role"]}
+
+def addressJSON(email, addr):
+    entry = {"email": email}
+    if addr["user"]:
+        entry["user"] = "http://localhost/3.1/users/%s" % addr["user"]
+    return entry
+
+class restHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    def log_message(self, *args):
+        pass
+    def reply(self, status, data = None, location = None):
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+        self.send_response(status)
+        if location:
+            self.send_header("Location", "http://localhost/3.1" + location)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    def form(self):
+        size = int(self.headers.get("Content-Length") or 0)
+        return { key: val[0] for (key, val) in urllib.parse.parse_qs(self.rfile.read(size).decode("utf-8")).items() }
+    def paged(self, query, entries):
+        count = int(query.get("count", ["50"])[0])
+        page = int(query.get("page", ["1"])[0])
+        self.reply(200, {"total_size": len(entries), "entries": entries[(page-1)*count:page*count]})
+    def route(self, method):
+        url = urllib.parse.urlsplit(self.path)
+        path = urllib.parse.unquote(url.path)[len("/3.1"):]
+        query = urllib.parse.parse_qs(url.query)
+        form = self.form() if method != "GET" else {}
+        match = lambda pattern: re.fullmatch(pattern, path)
+        # Lists
+        if path == "/lists" and method == "GET":
+            return self.paged(query, [{"list_id": key, "fqdn_listname": ml["fqdn"]} for (key, ml) in sorted(lists.items())])
+        if path == "/lists" and method == "POST":
+            listId = form["fqdn_listname"].replace("@", ".")
+            lists[listId] = {"fqdn": form["fqdn_listname"], "config": {"default_member_action": "defer"}}
+            return self.reply(201, None, "/lists/" + listId)
+        if (m := match(r"/lists/([^/]+)/roster/(\w+)")):
+            return self.paged(query, [memberJSON(key, member) for (key, member) in sorted(members.items())
+                                      if member["list_id"] == m[1] and member["role"] == m[2]])
+        if (m := match(r"/lists/([^/]+)/config")):
+            if method == "GET":
+                return self.reply(200, lists[m[1]]["config"])
+            lists[m[1]]["config"].update(form)
+            return self.reply(204)
+        if (m := match(r"/lists/([^/]+)")):
+            listId = m[1].replace("@", ".")
+            if listId not in lists:
+                return self.reply(404)
+            return self.reply(200, {"list_id": listId, "fqdn_listname": lists[listId]["fqdn"]})
+        # Addresses
+        if path == "/addresses":
+            return self.paged(query, [addressJSON(email, addr) for (email, addr) in sorted(addrs.items())])
+        if (m := match(r"/addresses/([^/]+)/verify")):
+            addrs[m[1]]["verified"] = True
+            return self.reply(204)
+        if (m := match(r"/addresses/([^/]+)")):
+            addr = addrs.get(m[1].lower())
+            return self.reply(200, addressJSON(m[1].lower(), addr)) if addr else self.reply(404)
+        # Users
+        if path == "/users" and method == "POST":
+            user = "u%i" % next(ids)
+            users[user] = {"name": form.get("display_name"), "pref": None}
+            addrs[form["email"].lower()] = {"user": user, "verified": False}
+            return self.reply(201, None, "/users/" + user)
+        if (m := match(r"/users/([^/]+)/addresses")):
+            if method == "GET":
+                return self.paged(query, [{"email": email} for (email, addr) in sorted(addrs.items()) if addr["user"] == m[1]])
+            email = form["email"].lower()
+            if email in addrs:
+                return self.reply(400, {"description": "Address belongs to other user"})
+            addrs[email] = {"user": m[1], "verified": False}
+            return self.reply(201, None, "/addresses/" + email)
+        if (m := match(r"/users/([^/]+)/preferred_address")):
+            if method == "GET":
+                pref = users[m[1]]["pref"]
+                return self.reply(200, {"email": pref}) if pref else self.reply(404)
+            if method == "DELETE":
+                users[m[1]]["pref"] = None
+                return self.reply(204)
+            assert(addrs[form["email"]]["verified"])
+            users[m[1]]["pref"] = form["email"]
+            return self.reply(201, None, "/addresses/" + form["email"])
+        if (m := match(r"/users/([^/]+)")):
+            addr = addrs.get(m[1].lower())
+            return self.reply(200, {"user_id": addr["user"]}) if addr and addr["user"] else self.reply(404)
+        # Members
+        if path == "/members" and method == "POST":
+            subscriber = form["subscriber"]
+            memberId = "m%i" % next(ids)
+            if "@" in subscriber:
+                addrs.setdefault(subscriber, {"user": None, "verified": True})
+                members[memberId] = {"list_id": form["list_id"], "email": subscriber, "role": form["role"], "user": None}
+            else:
+                members[memberId] = {"list_id": form["list_id"], "email": None, "role": form["role"], "user": subscriber}
+            return self.reply(201, None, "/members/" + memberId)
+        if path == "/members/find":
+            return self.reply(200, {"entries": [memberJSON(key, member) for (key, member) in members.items()
+                                                if member["list_id"] == form["list_id"] and member["role"] == form["role"]
+                                                and memberJSON(key, member)["email"] == form["subscriber"]]})
+        if (m := match(r"/members/([^/]+)")):
+            if method == "DELETE":
+                del members[m[1]]
+            else:
+                members[m[1]].update(form)
+            return self.reply(204)
+        self.reply(404, {"path": path})
+    def do_GET(self):
+        self.route("GET")
+    def do_POST(self):
+        self.route("POST")
+    def do_PATCH(self):
+        self.route("PATCH")
+    def do_DELETE(self):
+        self.route("DELETE")
+
+
+def roster(port, listId, role):
+    "Print the sorted emails subscribed to listId with role"
+    url = "http://127.0.0.1:%i/3.1/lists/%s/roster/%s?count=1000" % (port, listId, role)
+    with urllib.request.urlopen(url) as resp:
+        entries = json.load(resp)["entries"]
+    for email in sorted(entry["email"] for entry in entries):
+        print(email)
+
+def main(argv):
+    if len(argv) == 5 and argv[2] == "roster":
+        roster(int(argv[1]), argv[3], argv[4])
+        return 0
+    if len(argv) != 2:
+        print("Usage: reststub.py PORT [roster LIST ROLE]")
+        return 1
+    ThreadingHTTPServer(("127.0.0.1", int(argv[1])), restHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))